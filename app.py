@@ -1,12 +1,24 @@
+import hashlib
+import io
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import warnings
 warnings.filterwarnings('ignore')
 
+# Serialisasi figure dengan orjson: array numerik di-encode C-level,
+# memangkas byte payload websocket untuk tab yang padat chart
+pio.json.config.default_engine = 'orjson'
+
 # Import modules
 from data_analyzer import SalesDataAnalyzer
 from chatbot import GroqChatbot
@@ -33,23 +45,6 @@ st.markdown("""
         margin-bottom: 2rem;
     }
     
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1rem;
-        border-radius: 10px;
-        color: white;
-        text-align: center;
-        margin: 0.5rem 0;
-    }
-    
-    .insight-box {
-        background: #f8f9fa;
-        border-left: 4px solid #28a745;
-        padding: 1rem;
-        margin: 1rem 0;
-        border-radius: 5px;
-    }
-    
     .sidebar .sidebar-content {
         background: linear-gradient(180deg, #667eea 0%, #764ba2 100%);
     }
@@ -59,6 +54,168 @@ st.markdown("""
 # Header utama
 st.markdown('<h1 class="main-header">📊 Sales Menu COGS Analytics Dashboard</h1>', unsafe_allow_html=True)
 
+@st.cache_resource(max_entries=8, validate=lambda analyzer: not analyzer.data.empty)
+def _load_analyzer(file_bytes: bytes, file_name: str) -> SalesDataAnalyzer:
+    """
+    Membuat SalesDataAnalyzer dari bytes file upload.
+
+    Di-cache dengan st.cache_resource (keyed pada isi + nama file) supaya
+    parsing Excel yang mahal tidak diulang pada setiap rerun Streamlit.
+    Hasil parse pertama disimpan sebagai snapshot Parquet (keyed pada hash
+    isi file), sehingga upload ulang file yang sama — termasuk setelah
+    restart aplikasi — dimuat via pyarrow tanpa lewat openpyxl lagi.
+    """
+    file_hash = hashlib.blake2b(file_bytes, digest_size=16).hexdigest()
+    snapshot = Path(tempfile.gettempdir()) / f"sales_{file_hash}.parquet"
+
+    if snapshot.exists():
+        return SalesDataAnalyzer(pd.read_parquet(snapshot))
+
+    analyzer = SalesDataAnalyzer(io.BytesIO(file_bytes))
+    try:
+        analyzer.raw_data.to_parquet(snapshot, compression='zstd')
+    except Exception:
+        # Snapshot hanya optimasi; gagal menulis tidak boleh menggagalkan upload
+        pass
+    return analyzer
+
+@st.cache_data(max_entries=32, hash_funcs={SalesDataAnalyzer: id})
+def _apply_filters(analyzer, date_range, categories, branch):
+    """
+    Wrapper ber-cache untuk analyzer.apply_filters.
+
+    Kombinasi filter yang sama (tanggal, kategori, cabang) mengembalikan
+    DataFrame hasil memoisasi, sehingga pindah tab tidak mengulang
+    pipeline boolean-mask pandas.
+    """
+    return analyzer.apply_filters(date_range, list(categories), branch)
+
+# Worker tunggal untuk menyusun PDF di luar thread utama Streamlit
+_PDF_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
+# Fingerprint ringan untuk DataFrame hasil filter: panjang + hash index.
+# Jauh lebih murah daripada menghash seluruh isi frame pada tiap rerun.
+_DF_HASH_FUNCS = {
+    pd.DataFrame: lambda d: (len(d), int(pd.util.hash_pandas_object(d.index).sum()))
+}
+
+@st.cache_data(hash_funcs={SalesDataAnalyzer: id, **_DF_HASH_FUNCS})
+def _category_summary(analyzer, data):
+    """
+    Ringkasan per kategori yang dipakai bersama oleh tab overview,
+    profitabilitas, analisis menu, dan COGS — satu traversal groupby
+    per perubahan filter, bukan satu per chart.
+
+    analyzer ikut menjadi bagian kunci cache (seperti _temporal_aggregates)
+    agar dua file berbeda dengan fingerprint frame yang sama tidak saling
+    menimpa entri cache antar sesi/upload.
+    """
+    return data.groupby('Menu Category', observed=True).agg(**{
+        'Total': ('Total', 'sum'),
+        'Qty': ('Qty', 'sum'),
+        'Margin': ('Margin', 'sum'),
+        'COGS Total': ('COGS Total', 'sum'),
+        'COGS Total (%)': ('COGS Total (%)', 'mean')
+    }).reset_index()
+
+@st.cache_data(hash_funcs={SalesDataAnalyzer: id, **_DF_HASH_FUNCS})
+def _temporal_aggregates(analyzer, data):
+    """
+    Keempat agregat tab temporal (per jam, per hari, mingguan, heatmap)
+    dihitung sekali per hasil filter dan dipakai ulang di setiap rerun.
+    """
+    return (
+        analyzer.get_hourly_sales_pattern(data),
+        analyzer.get_daily_sales_pattern(data),
+        analyzer.get_weekly_trend(data),
+        analyzer.get_sales_heatmap_data(data)
+    )
+
+@st.cache_data(hash_funcs={SalesDataAnalyzer: id, **_DF_HASH_FUNCS})
+def _data_summary(analyzer, data):
+    """Ringkasan data untuk konteks AI, di-cache per hasil filter."""
+    return analyzer.prepare_data_summary_for_ai(data)
+
+def _top_n(df, col, n=10):
+    """
+    Ambil n baris teratas menurut kolom `col` dengan partial sort
+    (np.argpartition, O(N)) alih-alih full sort O(N log N) via nlargest.
+    """
+    if len(df) <= n:
+        return df.sort_values(col, ascending=False)
+
+    vals = df[col].to_numpy()
+    idx = np.argpartition(-vals, n)[:n]
+    return df.iloc[idx].sort_values(col, ascending=False)
+
+def _lttb_indices(x, y, n_out=2000):
+    """
+    Largest-Triangle-Three-Buckets: pilih indeks titik yang mempertahankan
+    bentuk visual (puncak/lembah) sebuah time-series.
+
+    Args:
+        x: Array numerik sumbu-x (sudah terurut)
+        y: Array numerik sumbu-y
+        n_out: Jumlah maksimum titik yang dipertahankan
+
+    Returns:
+        np.ndarray: Indeks titik terpilih (terurut naik)
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # Batas bucket untuk titik-titik di antara titik pertama dan terakhir
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Rata-rata bucket berikutnya (titik terakhir untuk bucket terakhir)
+        if i + 2 < n_out - 1:
+            nlo, nhi = edges[i + 1], edges[i + 2]
+        else:
+            nlo, nhi = n - 1, n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+        # Luas segitiga antara titik terpilih sebelumnya, kandidat, dan
+        # rata-rata bucket berikutnya (rumus cross-product tervektorisasi)
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+
+    return idx
+
+def _downsample_trend(df, x_col, y_cols, n_out=2000):
+    """
+    Downsample DataFrame time-series dengan LTTB sebelum diserahkan ke
+    Plotly, supaya jumlah titik yang dikirim ke browser sebanding dengan
+    lebar canvas, bukan jumlah baris data.
+
+    Untuk multi-series, indeks hasil LTTB tiap kolom digabung sehingga
+    puncak semua series tetap terlihat.
+    """
+    if len(df) <= n_out:
+        return df
+
+    x = df[x_col]
+    if x.dtype == object:
+        x = pd.to_datetime(x)
+    x = x.to_numpy()
+    if x.dtype.kind == 'M':
+        x = x.view('int64')
+    x = x.astype('float64')
+
+    keep = np.unique(np.concatenate([
+        _lttb_indices(x, df[col].to_numpy(dtype='float64'), n_out)
+        for col in y_cols
+    ]))
+    return df.iloc[keep]
+
 def main():
     # Sidebar untuk upload file dan konfigurasi
     with st.sidebar:
@@ -72,9 +229,9 @@ def main():
         )
         
         if uploaded_file is not None:
-            # Load data
+            # Load data (hasil parsing di-cache antar rerun)
             try:
-                analyzer = SalesDataAnalyzer(uploaded_file)
+                analyzer = _load_analyzer(uploaded_file.getvalue(), uploaded_file.name)
                 st.success("✅ File berhasil dimuat!")
                 
                 # Info data
@@ -85,34 +242,52 @@ def main():
                 with col2:
                     st.metric("Periode Data", f"{analyzer.get_date_range()}")
                 
-                # Filter data
+                # Filter data — dibungkus form agar perubahan beberapa widget
+                # sekaligus hanya memicu satu rerun saat tombol ditekan,
+                # bukan satu rerun per widget
                 st.markdown("#### 🔍 Filter Data")
-                
-                # Filter tanggal
-                date_range = st.date_input(
-                    "Pilih Rentang Tanggal",
-                    value=(analyzer.min_date.date(), analyzer.max_date.date()),
-                    min_value=analyzer.min_date.date(),
-                    max_value=analyzer.max_date.date()
-                )
-                
-                # Filter kategori menu
-                categories = st.multiselect(
-                    "Pilih Kategori Menu",
-                    options=analyzer.get_unique_categories(),
-                    default=analyzer.get_unique_categories()
+
+                with st.form("filters"):
+                    # Filter tanggal
+                    date_range = st.date_input(
+                        "Pilih Rentang Tanggal",
+                        value=(analyzer.min_date.date(), analyzer.max_date.date()),
+                        min_value=analyzer.min_date.date(),
+                        max_value=analyzer.max_date.date()
+                    )
+
+                    # Filter kategori menu (daftar unik sudah di-precompute)
+                    unique_categories = analyzer.get_unique_categories()
+                    categories = st.multiselect(
+                        "Pilih Kategori Menu",
+                        options=unique_categories,
+                        default=unique_categories
+                    )
+
+                    # Filter cabang (jika ada lebih dari satu)
+                    branches = analyzer.get_unique_branches()
+                    if len(branches) > 1:
+                        selected_branch = st.selectbox("Pilih Cabang", branches)
+                    else:
+                        selected_branch = branches[0] if branches else None
+
+                    filters_applied = st.form_submit_button("Terapkan Filter")
+
+                # Simpan filter terakhir yang diterapkan di session_state;
+                # reset otomatis bila file yang dimuat berganti
+                filters_key = (uploaded_file.name, analyzer.total_records)
+                if (filters_applied
+                        or st.session_state.get('filters_key') != filters_key):
+                    st.session_state.filters_key = filters_key
+                    st.session_state.applied_filters = (
+                        date_range, tuple(sorted(categories)), selected_branch
+                    )
+
+                # Apply filters (kategori diurutkan jadi tuple agar hashable)
+                filtered_data = _apply_filters(
+                    analyzer, *st.session_state.applied_filters
                 )
                 
-                # Filter cabang (jika ada lebih dari satu)
-                branches = analyzer.get_unique_branches()
-                if len(branches) > 1:
-                    selected_branch = st.selectbox("Pilih Cabang", branches)
-                else:
-                    selected_branch = branches[0] if branches else None
-                
-                # Apply filters
-                filtered_data = analyzer.apply_filters(date_range, categories, selected_branch)
-                
             except Exception as e:
                 st.error(f"❌ Error loading file: {str(e)}")
                 return
@@ -147,63 +322,51 @@ def main():
         with tab6:
             display_chatbot(analyzer, filtered_data)
         
-        # Export button
+        # Export button — render PDF di background thread supaya UI tetap
+        # responsif selama laporan disusun
         st.markdown("---")
         col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
             if st.button("📄 Export Laporan PDF", use_container_width=True):
                 pdf_exporter = PDFExporter(analyzer, filtered_data)
-                pdf_buffer = pdf_exporter.generate_report()
-                
-                st.download_button(
-                    label="💾 Download PDF Report",
-                    data=pdf_buffer.getvalue(),
-                    file_name=f"sales_cogs_report_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                    mime="application/pdf",
-                    use_container_width=True
-                )
+                st.session_state.pdf_future = _PDF_EXECUTOR.submit(pdf_exporter.generate_report)
 
+            pdf_future = st.session_state.get('pdf_future')
+            if pdf_future is not None:
+                if pdf_future.done():
+                    try:
+                        pdf_buffer = pdf_future.result()
+                        st.download_button(
+                            label="💾 Download PDF Report",
+                            data=pdf_buffer.getvalue(),
+                            file_name=f"sales_cogs_report_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                            mime="application/pdf",
+                            use_container_width=True
+                        )
+                    except Exception as e:
+                        st.session_state.pop('pdf_future', None)
+                        st.error(f"❌ Error generating PDF: {str(e)}")
+                else:
+                    st.info("⏳ Laporan PDF sedang disusun...")
+                    time.sleep(0.5)
+                    st.rerun()
+
+@st.fragment
 def display_overview(analyzer, data):
     st.markdown("## 📈 Ringkasan Eksekutif")
     
-    # Key metrics dalam cards
+    # Hitung ketiga total dalam satu pass kolom, bukan tiga reduksi terpisah
+    total_revenue, total_cogs, total_margin = data[['Total', 'COGS Total', 'Margin']].sum()
+
+    # Key metrics dengan komponen native (tanpa parsing HTML per kartu)
     col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        total_revenue = data['Total'].sum()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>💰 Total Revenue</h3>
-            <h2>Rp {total_revenue:,.0f}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        total_cogs = data['COGS Total'].sum()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>📦 Total COGS</h3>
-            <h2>Rp {total_cogs:,.0f}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        total_margin = data['Margin'].sum()
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>📊 Total Margin</h3>
-            <h2>Rp {total_margin:,.0f}</h2>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        avg_margin_pct = (total_margin / total_revenue) * 100 if total_revenue > 0 else 0
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>📈 Margin %</h3>
-            <h2>{avg_margin_pct:.1f}%</h2>
-        </div>
-        """, unsafe_allow_html=True)
+
+    col1.metric("💰 Total Revenue", f"Rp {total_revenue:,.0f}")
+    col2.metric("📦 Total COGS", f"Rp {total_cogs:,.0f}")
+    col3.metric("📊 Total Margin", f"Rp {total_margin:,.0f}")
+
+    avg_margin_pct = (total_margin / total_revenue) * 100 if total_revenue > 0 else 0
+    col4.metric("📈 Margin %", f"{avg_margin_pct:.1f}%")
     
     # # Insight boxes
     # st.markdown("### 🔍 Insight Utama")
@@ -242,33 +405,27 @@ def display_overview(analyzer, data):
     with col1:
         # Top performing menu
         top_menu = analyzer.get_top_performing_menus(data, 5)
-        st.markdown(f"""
-        <div class="insight-box">
-            <h4 style="color: black;">🏆 Menu Terlaris</h4>
-            <p style="color: black;"><strong style="color: black;">{top_menu.iloc[0]['Menu']}</strong></p>
-            <p style="color: black;">Total Terjual: {top_menu.iloc[0]['Total_Qty']} unit</p>
-            <p style="color: black;">Revenue: Rp {top_menu.iloc[0]['Total_Revenue']:,.0f}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        with st.container(border=True):
+            st.markdown("#### 🏆 Menu Terlaris")
+            st.markdown(f"**{top_menu.iloc[0]['Menu']}**")
+            st.markdown(f"Total Terjual: {top_menu.iloc[0]['Total_Qty']} unit")
+            st.markdown(f"Revenue: Rp {top_menu.iloc[0]['Total_Revenue']:,.0f}")
 
     with col2:
         # Most profitable menu
         most_profitable = analyzer.get_most_profitable_menus(data, 5)
-        st.markdown(f"""
-        <div class="insight-box">
-            <h4 style="color: black;">💎 Menu Paling Menguntungkan</h4>
-            <p style="color: black;"><strong style="color: black;">{most_profitable.iloc[0]['Menu']}</strong></p>
-            <p style="color: black;">Margin per Unit: Rp {most_profitable.iloc[0]['Avg_Margin']:.0f}</p>
-            <p style="color: black;">Margin %: {most_profitable.iloc[0]['Margin_Percentage']:.1f}%</p>
-        </div>
-        """, unsafe_allow_html=True)
+        with st.container(border=True):
+            st.markdown("#### 💎 Menu Paling Menguntungkan")
+            st.markdown(f"**{most_profitable.iloc[0]['Menu']}**")
+            st.markdown(f"Margin per Unit: Rp {most_profitable.iloc[0]['Avg_Margin']:.0f}")
+            st.markdown(f"Margin %: {most_profitable.iloc[0]['Margin_Percentage']:.1f}%")
 
     # Charts overview
     col1, col2 = st.columns(2)
     
     with col1:
         # Revenue by category
-        category_revenue = data.groupby('Menu Category')['Total'].sum().reset_index()
+        category_revenue = _category_summary(analyzer, data)
         fig = px.pie(
             category_revenue, 
             values='Total', 
@@ -281,13 +438,15 @@ def display_overview(analyzer, data):
     
     with col2:
         # Daily sales trend
-        daily_sales = analyzer.get_daily_sales_trend(data)
+        daily_sales = _downsample_trend(
+            analyzer.get_daily_sales_trend(data), 'Sales Date', ['Daily_Revenue']
+        )
         fig = px.line(
-            daily_sales, 
-            x='Sales Date', 
+            daily_sales,
+            x='Sales Date',
             y='Daily_Revenue',
             title="📈 Tren Penjualan Harian",
-            line_shape='spline'
+            render_mode='webgl'
         )
         fig.update_layout(
             xaxis_title="Tanggal",
@@ -296,22 +455,26 @@ def display_overview(analyzer, data):
         )
         st.plotly_chart(fig, use_container_width=True)
 
+@st.fragment
 def display_profitability_analysis(analyzer, data):
     st.markdown("## 🎯 Analisis Profitabilitas Mendalam")
     
+    # Satu pass untuk kedua total; metrik lain diturunkan dari hasilnya
+    total_revenue, total_cogs = data[['Total', 'COGS Total']].sum()
+    avg_cogs_pct = data['COGS Total (%)'].mean()
+
     # Profitability metrics
     col1, col2, col3 = st.columns(3)
-    
+
     with col1:
-        avg_cogs_pct = data['COGS Total (%)'].mean()
         st.metric("📦 Rata-rata COGS %", f"{avg_cogs_pct:.1f}%")
-    
+
     with col2:
-        gross_margin = ((data['Total'].sum() - data['COGS Total'].sum()) / data['Total'].sum()) * 100
+        gross_margin = ((total_revenue - total_cogs) / total_revenue) * 100
         st.metric("📊 Gross Margin %", f"{gross_margin:.1f}%")
-    
+
     with col3:
-        avg_transaction = data['Total'].mean()
+        avg_transaction = total_revenue / len(data) if len(data) > 0 else 0
         st.metric("💰 Rata-rata Transaksi", f"Rp {avg_transaction:,.0f}")
     
     # Profitability analysis charts
@@ -328,7 +491,8 @@ def display_profitability_analysis(analyzer, data):
             color='Menu Category',
             hover_data=['Menu'],
             title="🎯 Analisis Profitabilitas Menu",
-            labels={'Avg_COGS_Pct': 'COGS % Rata-rata', 'Total_Margin': 'Total Margin (Rp)'}
+            labels={'Avg_COGS_Pct': 'COGS % Rata-rata', 'Total_Margin': 'Total Margin (Rp)'},
+            render_mode='webgl'
         )
         st.plotly_chart(fig, use_container_width=True)
     
@@ -365,11 +529,8 @@ def display_profitability_analysis(analyzer, data):
     
     with col2:
         # Category-wise COGS analysis
-        cogs_by_category = data.groupby('Menu Category').agg({
-            'COGS Total (%)': 'mean',
-            'Total': 'sum'
-        }).reset_index()
-        
+        cogs_by_category = _category_summary(analyzer, data)
+
         fig = px.bar(
             cogs_by_category,
             x='Menu Category',
@@ -380,6 +541,7 @@ def display_profitability_analysis(analyzer, data):
         )
         st.plotly_chart(fig, use_container_width=True)
 
+@st.fragment
 def display_menu_analysis(analyzer, data):
     st.markdown("## 📊 Analisis Menu Mendalam")
     
@@ -393,12 +555,12 @@ def display_menu_analysis(analyzer, data):
     
     with col1:
         st.markdown("#### 📈 Berdasarkan Volume Penjualan")
-        top_volume = menu_performance.nlargest(10, 'Total_Qty')[['Menu', 'Total_Qty', 'Total_Revenue', 'Avg_Margin']]
+        top_volume = _top_n(menu_performance, 'Total_Qty')[['Menu', 'Total_Qty', 'Total_Revenue', 'Avg_Margin']]
         st.dataframe(top_volume, use_container_width=True)
     
     with col2:
         st.markdown("#### 💰 Berdasarkan Revenue")
-        top_revenue = menu_performance.nlargest(10, 'Total_Revenue')[['Menu', 'Total_Revenue', 'Total_Qty', 'Margin_Percentage']]
+        top_revenue = _top_n(menu_performance, 'Total_Revenue')[['Menu', 'Total_Revenue', 'Total_Qty', 'Margin_Percentage']]
         st.dataframe(top_revenue, use_container_width=True)
     
     # Menu analysis charts
@@ -406,12 +568,8 @@ def display_menu_analysis(analyzer, data):
     
     with col1:
         # Menu category performance
-        category_performance = data.groupby('Menu Category').agg({
-            'Qty': 'sum',
-            'Total': 'sum',
-            'Margin': 'sum'
-        }).reset_index()
-        
+        category_performance = _category_summary(analyzer, data)
+
         fig = px.bar(
             category_performance,
             x='Menu Category',
@@ -429,19 +587,26 @@ def display_menu_analysis(analyzer, data):
             y='Qty',
             color='Menu Category',
             title="💰 Korelasi Harga vs Kuantitas",
-            hover_data=['Menu']
+            hover_data=['Menu'],
+            render_mode='webgl'
         )
         st.plotly_chart(fig, use_container_width=True)
     
+    # Fragment tersendiri: ganti menu terpilih tidak membangun ulang
+    # tabel dan chart kategori di atasnya
+    _display_menu_detail(data)
+
+@st.fragment
+def _display_menu_detail(data):
     # Menu detail analysis
     st.markdown("### 🔍 Analisis Detail Menu")
-    
+
     # Menu selector
     selected_menu = st.selectbox(
         "Pilih menu untuk analisis detail:",
         options=data['Menu'].unique()
     )
-    
+
     if selected_menu:
         menu_data = data[data['Menu'] == selected_menu]
         
@@ -464,25 +629,30 @@ def display_menu_analysis(analyzer, data):
             'Qty': 'sum',
             'Total': 'sum'
         }).reset_index()
-        
+        menu_daily = _downsample_trend(menu_daily, 'Sales Date', ['Qty', 'Total'])
+
         fig = px.line(
             menu_daily,
             x='Sales Date',
             y=['Qty', 'Total'],
             title=f"📈 Tren Penjualan {selected_menu}",
-            labels={'value': 'Nilai', 'Sales Date': 'Tanggal'}
+            labels={'value': 'Nilai', 'Sales Date': 'Tanggal'},
+            render_mode='webgl'
         )
         st.plotly_chart(fig, use_container_width=True)
 
+@st.fragment
 def display_temporal_analysis(analyzer, data):
     st.markdown("## ⏰ Analisis Temporal")
-    
+
+    # Keempat agregat dihitung sekali per filter (cached)
+    hourly_sales, daily_pattern, weekly_trend, heatmap_data = _temporal_aggregates(analyzer, data)
+
     # Time-based analysis
     col1, col2 = st.columns(2)
-    
+
     with col1:
         # Hourly sales pattern
-        hourly_sales = analyzer.get_hourly_sales_pattern(data)
         fig = px.bar(
             hourly_sales,
             x='Hour',
@@ -495,7 +665,6 @@ def display_temporal_analysis(analyzer, data):
     
     with col2:
         # Daily sales pattern
-        daily_pattern = analyzer.get_daily_sales_pattern(data)
         fig = px.bar(
             daily_pattern,
             x='Day_Name',
@@ -511,7 +680,7 @@ def display_temporal_analysis(analyzer, data):
     
     with col1:
         # Weekly trend
-        weekly_trend = analyzer.get_weekly_trend(data)
+        weekly_trend = _downsample_trend(weekly_trend, 'Week', ['Weekly_Revenue'])
         fig = px.line(
             weekly_trend,
             x='Week',
@@ -523,7 +692,6 @@ def display_temporal_analysis(analyzer, data):
     
     with col2:
         # Sales heatmap by hour and day
-        heatmap_data = analyzer.get_sales_heatmap_data(data)
         fig = px.imshow(
             heatmap_data,
             title="🔥 Heatmap Penjualan (Jam vs Hari)",
@@ -532,22 +700,25 @@ def display_temporal_analysis(analyzer, data):
         )
         st.plotly_chart(fig, use_container_width=True)
 
+@st.fragment
 def display_cogs_analysis(analyzer, data):
     st.markdown("## 💰 Analisis COGS Mendalam")
     
+    # Satu pass untuk kedua total; efisiensi diturunkan tanpa scan ulang
+    total_cogs, total_revenue = data[['COGS Total', 'Total']].sum()
+    avg_cogs_pct = data['COGS Total (%)'].mean()
+
     # COGS overview
     col1, col2, col3 = st.columns(3)
-    
+
     with col1:
-        total_cogs = data['COGS Total'].sum()
         st.metric("📦 Total COGS", f"Rp {total_cogs:,.0f}")
-    
+
     with col2:
-        avg_cogs_pct = data['COGS Total (%)'].mean()
         st.metric("📊 Rata-rata COGS %", f"{avg_cogs_pct:.1f}%")
-    
+
     with col3:
-        cogs_efficiency = analyzer.calculate_cogs_efficiency(data)
+        cogs_efficiency = 100 - (total_cogs / total_revenue) * 100 if total_revenue > 0 else 0
         st.metric("⚡ Efisiensi COGS", f"{cogs_efficiency:.1f}%")
     
     # COGS analysis charts
@@ -555,11 +726,8 @@ def display_cogs_analysis(analyzer, data):
     
     with col1:
         # COGS by menu category
-        cogs_by_category = data.groupby('Menu Category').agg({
-            'COGS Total': 'sum',
-            'COGS Total (%)': 'mean'
-        }).reset_index()
-        
+        cogs_by_category = _category_summary(analyzer, data)
+
         fig = px.treemap(
             cogs_by_category,
             path=['Menu Category'],
@@ -572,12 +740,15 @@ def display_cogs_analysis(analyzer, data):
     
     with col2:
         # COGS trend over time
-        cogs_trend = analyzer.get_cogs_trend(data)
+        cogs_trend = _downsample_trend(
+            analyzer.get_cogs_trend(data), 'Sales Date', ['Daily_COGS', 'Daily_Revenue']
+        )
         fig = px.line(
             cogs_trend,
             x='Sales Date',
             y=['Daily_COGS', 'Daily_Revenue'],
-            title="📈 Tren COGS vs Revenue Harian"
+            title="📈 Tren COGS vs Revenue Harian",
+            render_mode='webgl'
         )
         st.plotly_chart(fig, use_container_width=True)
     
@@ -601,14 +772,12 @@ def display_cogs_analysis(analyzer, data):
     recommendations = analyzer.get_cogs_optimization_recommendations(data)
     
     for i, rec in enumerate(recommendations, 1):
-        st.markdown(f"""
-        <div class="insight-box">
-            <h4>{i}. {rec['title']}</h4>
-            <p>{rec['description']}</p>
-            <p><strong>Potensi Penghematan:</strong> {rec['potential_saving']}</p>
-        </div>
-        """, unsafe_allow_html=True)
+        with st.container(border=True):
+            st.markdown(f"#### {i}. {rec['title']}")
+            st.markdown(rec['description'])
+            st.markdown(f"**Potensi Penghematan:** {rec['potential_saving']}")
 
+@st.fragment
 def display_chatbot(analyzer, data):
     st.markdown("## 🤖 Chat dengan AI Data Analyst")
     
@@ -642,24 +811,25 @@ def display_chatbot(analyzer, data):
             'content': user_question
         })
         
-        # Get response from AI
-        with st.spinner("🤔 AI sedang menganalisis data..."):
-            try:
-                # Prepare data context for AI
-                data_context = analyzer.prepare_data_summary_for_ai(data)
-                ai_response = st.session_state.chatbot.get_response(user_question, data_context)
-                
-                # Add AI response to history
-                st.session_state.chat_history.append({
-                    'role': 'assistant',
-                    'content': ai_response
-                })
-                
-                # Rerun to update chat display
-                st.rerun()
-                
-            except Exception as e:
-                st.error(f"❌ Error: {str(e)}")
+        st.markdown(f"**🧑‍💼 Anda:** {user_question}")
+
+        # Stream respons token demi token, tanpa menunggu generasi penuh
+        try:
+            # Prepare data context for AI (di-cache per hasil filter)
+            data_context = _data_summary(analyzer, data)
+            st.markdown("**🤖 AI Analyst:**")
+            ai_response = st.write_stream(
+                st.session_state.chatbot.stream_response(user_question, data_context)
+            )
+
+            # Add AI response to history
+            st.session_state.chat_history.append({
+                'role': 'assistant',
+                'content': ai_response
+            })
+
+        except Exception as e:
+            st.error(f"❌ Error: {str(e)}")
     
     # Suggested questions
     st.markdown("### 💡 Pertanyaan yang Disarankan")
@@ -685,20 +855,22 @@ def display_chatbot(analyzer, data):
                 'content': question
             })
             
-            with st.spinner("🤔 AI sedang menganalisis data..."):
-                try:
-                    data_context = analyzer.prepare_data_summary_for_ai(data)
-                    ai_response = st.session_state.chatbot.get_response(question, data_context)
-                    
-                    st.session_state.chat_history.append({
-                        'role': 'assistant',
-                        'content': ai_response
-                    })
-                    
-                    st.rerun()
-                    
-                except Exception as e:
-                    st.error(f"❌ Error: {str(e)}")
+            st.markdown(f"**🧑‍💼 Anda:** {question}")
+
+            try:
+                data_context = _data_summary(analyzer, data)
+                st.markdown("**🤖 AI Analyst:**")
+                ai_response = st.write_stream(
+                    st.session_state.chatbot.stream_response(question, data_context)
+                )
+
+                st.session_state.chat_history.append({
+                    'role': 'assistant',
+                    'content': ai_response
+                })
+
+            except Exception as e:
+                st.error(f"❌ Error: {str(e)}")
     
     # Clear chat button
     if st.button("🗑️ Hapus Riwayat Chat"):
@@ -1,6 +1,6 @@
 import os
 import json
-from typing import Dict, Any
+from typing import Dict, Any, Iterator
 from groq import Groq
 from dotenv import load_dotenv
 
@@ -56,6 +56,36 @@ class GroqChatbot:
         except Exception as e:
             return f"❌ Error saat mengambil respons dari AI: {str(e)}"
 
+    def stream_response(self, user_question: str, data_context: Dict[str, Any]) -> Iterator[str]:
+        """
+        Streaming jawaban token demi token (stream=True), sehingga UI bisa
+        menampilkan respons begitu token pertama tiba tanpa menunggu
+        generasi selesai.
+        """
+        try:
+            context_prompt = self._create_context_prompt(data_context)
+            messages = [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": f"Data penjualan:\n{context_prompt}\n\nPertanyaan: {user_question}"}
+            ]
+
+            stream = self.client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                temperature=0.3,
+                max_tokens=2048,
+                top_p=0.9,
+                stream=True
+            )
+
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+        except Exception as e:
+            yield f"❌ Error saat mengambil respons dari AI: {str(e)}"
+
     def _create_context_prompt(self, data_context: Dict[str, Any]) -> str:
         """
         Menyusun context prompt dari data penjualan.
@@ -4,6 +4,103 @@ from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+def _m4(df, x_col, y_col, width=1000):
+    """
+    Reduksi M4: untuk tiap kolom piksel (bucket sumbu-x) hanya pertahankan
+    baris min/max/first/last dari series y, sehingga maksimal 4*width titik
+    dikirim ke chart tanpa mengubah hasil render per piksel.
+
+    Args:
+        df: DataFrame yang sudah terurut pada x_col
+        x_col: Nama kolom sumbu-x
+        y_col: Nama kolom nilai yang menentukan min/max
+        width: Perkiraan lebar canvas dalam piksel
+
+    Returns:
+        pd.DataFrame: Subset baris df (skema kolom tidak berubah)
+    """
+    if len(df) <= 4 * width:
+        return df
+
+    x = df[x_col]
+    if x.dtype == object:
+        x = pd.to_datetime(x)
+    x = x.to_numpy()
+    if x.dtype.kind == 'M':
+        x = x.view('int64')
+    x = x.astype('float64')
+
+    # Bagi rentang x menjadi `width` bucket piksel
+    edges = np.linspace(x[0], x[-1], width + 1)
+    bin_ids = np.digitize(x, edges[1:-1])
+
+    y = pd.Series(df[y_col].to_numpy())
+    grouped = y.groupby(bin_ids)
+    firsts = np.unique(bin_ids, return_index=True)[1]
+    lasts = len(bin_ids) - 1 - np.unique(bin_ids[::-1], return_index=True)[1]
+
+    keep = np.unique(np.concatenate([
+        firsts, lasts,
+        grouped.idxmin().to_numpy(),
+        grouped.idxmax().to_numpy()
+    ]))
+    return df.iloc[keep]
+
+# Memo satu slot untuk metadata grup frame terakhir. Keempat leaderboard
+# per-menu dipanggil berulang pada frame filter yang sama dalam satu rerun;
+# kode categorical, bincount jumlah baris, dan mask menu yang muncul cukup
+# dihitung sekali lalu dipakai ulang (identitas frame dicek dengan `is`).
+_group_meta_cache = {}
+
+def _menu_group_meta(data):
+    """Metadata grup per frame: kode menu, jumlah baris, mask observed."""
+    cached = _group_meta_cache.get('last')
+    if cached is not None and cached[0] is data:
+        return cached[1:]
+
+    cat = data['Menu'].cat
+    codes = cat.codes.to_numpy()
+    counts = np.bincount(codes, minlength=len(cat.categories))
+    observed = counts > 0
+
+    _group_meta_cache['last'] = (data, codes, counts, observed)
+    return codes, counts, observed
+
+def _menu_group_reduce(data, sum_cols=None, mean_cols=None):
+    """
+    Reduksi sum/mean per menu lewat np.bincount pada kode categorical.
+
+    Satu pass C-level per kolom menggantikan mesin groupby generik pandas
+    untuk leaderboard per-menu yang dihitung di setiap render tab.
+
+    Args:
+        data: DataFrame dengan kolom 'Menu' ber-dtype category
+        sum_cols: Dict {nama_kolom_hasil: kolom_sumber} untuk jumlah per menu
+        mean_cols: Dict {nama_kolom_hasil: kolom_sumber} untuk rata-rata
+
+    Returns:
+        pd.DataFrame: Satu baris per menu yang muncul di data
+    """
+    codes, counts, observed = _menu_group_meta(data)
+    ngroups = len(counts)
+
+    result = {'Menu': data['Menu'].cat.categories[observed]}
+    for out_name, col in (sum_cols or {}).items():
+        sums = np.bincount(codes, weights=data[col].to_numpy(dtype='float64'),
+                           minlength=ngroups)[observed]
+        # bincount selalu menghasilkan float64; kembalikan ke integer
+        # untuk kolom sumber integer (mis. Qty) agar jumlah unit tetap
+        # tampil sebagai bilangan bulat seperti hasil groupby.sum()
+        if pd.api.types.is_integer_dtype(data[col]):
+            sums = sums.astype('int64')
+        result[out_name] = sums
+    for out_name, col in (mean_cols or {}).items():
+        sums = np.bincount(codes, weights=data[col].to_numpy(dtype='float64'),
+                           minlength=ngroups)
+        result[out_name] = sums[observed] / counts[observed]
+
+    return pd.DataFrame(result)
+
 class SalesDataAnalyzer:
     """
     Kelas untuk menganalisis data sales menu COGS secara mendalam.
@@ -28,17 +125,32 @@ class SalesDataAnalyzer:
         self.total_records = len(self.data)
         self.min_date = self.data['Sales Date'].min()
         self.max_date = self.data['Sales Date'].max()
+
+        # Precompute daftar unik sekali (kategori categorical sudah terurut),
+        # supaya widget tidak memicu scan kolom penuh di setiap rerun.
+        # Daftar menu tidak di-precompute: selectbox menu harus mengikuti
+        # hasil filter, bukan seluruh data.
+        self.unique_categories = self.data['Menu Category'].cat.categories.tolist()
+        if 'Branch' in self.data.columns:
+            self.unique_branches = self.data['Branch'].cat.categories.tolist()
+        else:
+            self.unique_branches = []
     
     def _load_data(self, uploaded_file):
         """
         Memuat data dari file Excel dan menemukan header yang benar.
-        
+
         Args:
-            uploaded_file: File Excel yang diupload
-            
+            uploaded_file: File Excel yang diupload, atau DataFrame yang
+                sudah diparse (mis. dari snapshot Parquet)
+
         Returns:
             pd.DataFrame: Data mentah dari Excel
         """
+        # Frame yang sudah diparse (snapshot) tidak perlu lewat openpyxl lagi
+        if isinstance(uploaded_file, pd.DataFrame):
+            return uploaded_file
+
         try:
             # Baca file Excel
             df = pd.read_excel(uploaded_file)
@@ -91,10 +203,21 @@ class SalesDataAnalyzer:
         
         # Hapus baris dengan nilai numerik yang tidak valid
         data = data.dropna(subset=numeric_columns)
-        
+
+        # Downcast numerik: float32 dan integer terkecil menghemat separuh
+        # bandwidth memori di semua reduksi. Error relatif ~1e-7 pada total
+        # Rupiah yang ditampilkan masih dapat diterima untuk dashboard.
+        for col in numeric_columns:
+            if col in data.columns:
+                if col == 'Qty':
+                    data[col] = pd.to_numeric(data[col], downcast='integer')
+                else:
+                    data[col] = data[col].astype('float32')
+
         # Tambah kolom analisis tambahan
         data['Hour'] = data['Sales Date'].dt.hour
         data['Day_of_Week'] = data['Sales Date'].dt.day_name()
+        data['Day_Index'] = data['Sales Date'].dt.dayofweek
         data['Week'] = data['Sales Date'].dt.isocalendar().week
         data['Month'] = data['Sales Date'].dt.month
         data['Date'] = data['Sales Date'].dt.date
@@ -102,7 +225,22 @@ class SalesDataAnalyzer:
         # Kalkulasi margin percentage jika belum ada
         if 'Margin_Percentage' not in data.columns:
             data['Margin_Percentage'] = (data['Margin'] / data['Total']) * 100
-        
+
+        # Kolom kunci ke dtype category: groupby selanjutnya bekerja pada
+        # kode integer, bukan hashing string
+        for col in ('Menu', 'Menu Category', 'Branch'):
+            if col in data.columns:
+                data[col] = data[col].astype('category')
+
+        # Kolom teks sisanya ke string Arrow: satu buffer kontigu per kolom,
+        # bukan satu PyObject per sel ('Date' tetap object berisi date)
+        for col in data.columns:
+            if col != 'Date' and data[col].dtype == object:
+                try:
+                    data[col] = data[col].astype('string[pyarrow]')
+                except (ImportError, ValueError, TypeError):
+                    pass
+
         return data
     
     def get_date_range(self):
@@ -112,14 +250,12 @@ class SalesDataAnalyzer:
         return f"{start_date} - {end_date}"
     
     def get_unique_categories(self):
-        """Mendapatkan daftar kategori menu unik."""
-        return sorted(self.data['Menu Category'].unique().tolist())
-    
+        """Mendapatkan daftar kategori menu unik (precomputed)."""
+        return self.unique_categories
+
     def get_unique_branches(self):
-        """Mendapatkan daftar cabang unik."""
-        if 'Branch' in self.data.columns:
-            return sorted(self.data['Branch'].unique().tolist())
-        return []
+        """Mendapatkan daftar cabang unik (precomputed)."""
+        return self.unique_branches
     
     def apply_filters(self, date_range, categories, branch=None):
         """
@@ -164,14 +300,12 @@ class SalesDataAnalyzer:
         Returns:
             pd.DataFrame: Top performing menus
         """
-        menu_performance = data.groupby('Menu').agg({
-            'Qty': 'sum',
-            'Total': 'sum',
-            'Margin': 'sum',
-            'COGS Total': 'sum'
-        }).reset_index()
-        
-        menu_performance.columns = ['Menu', 'Total_Qty', 'Total_Revenue', 'Total_Margin', 'Total_COGS']
+        menu_performance = _menu_group_reduce(data, sum_cols={
+            'Total_Qty': 'Qty',
+            'Total_Revenue': 'Total',
+            'Total_Margin': 'Margin',
+            'Total_COGS': 'COGS Total'
+        })
         menu_performance['Avg_Price'] = menu_performance['Total_Revenue'] / menu_performance['Total_Qty']
         menu_performance['Margin_Percentage'] = (menu_performance['Total_Margin'] / menu_performance['Total_Revenue']) * 100
         
@@ -188,15 +322,11 @@ class SalesDataAnalyzer:
         Returns:
             pd.DataFrame: Most profitable menus
         """
-        menu_profit = data.groupby('Menu').agg({
-            'Margin': ['sum', 'mean'],
-            'Total': 'sum',
-            'Qty': 'sum',
-            'COGS Total (%)': 'mean'
-        }).reset_index()
-        
-        # Flatten column names
-        menu_profit.columns = ['Menu', 'Total_Margin', 'Avg_Margin', 'Total_Revenue', 'Total_Qty', 'Avg_COGS_Pct']
+        menu_profit = _menu_group_reduce(
+            data,
+            sum_cols={'Total_Margin': 'Margin', 'Total_Revenue': 'Total', 'Total_Qty': 'Qty'},
+            mean_cols={'Avg_Margin': 'Margin', 'Avg_COGS_Pct': 'COGS Total (%)'}
+        )[['Menu', 'Total_Margin', 'Avg_Margin', 'Total_Revenue', 'Total_Qty', 'Avg_COGS_Pct']]
         menu_profit['Margin_Percentage'] = (menu_profit['Total_Margin'] / menu_profit['Total_Revenue']) * 100
         
         return menu_profit.nlargest(top_n, 'Avg_Margin')
@@ -211,7 +341,7 @@ class SalesDataAnalyzer:
         Returns:
             pd.DataFrame: Analisis komprehensif menu
         """
-        menu_analysis = data.groupby(['Menu', 'Menu Category']).agg({
+        menu_analysis = data.groupby(['Menu', 'Menu Category'], observed=True).agg({
             'Qty': ['sum', 'mean', 'count'],
             'Total': ['sum', 'mean'],
             'Margin': ['sum', 'mean'],
@@ -256,8 +386,10 @@ class SalesDataAnalyzer:
         
         # Tambah moving average
         daily_trend['Revenue_MA_7'] = daily_trend['Daily_Revenue'].rolling(window=7, min_periods=1).mean()
-        
-        return daily_trend.sort_values('Sales Date')
+
+        # Reduksi M4 supaya chart tidak menerima lebih banyak titik
+        # daripada piksel yang tersedia
+        return _m4(daily_trend.sort_values('Sales Date'), 'Sales Date', 'Daily_Revenue')
     
     def get_hourly_sales_pattern(self, data):
         """
@@ -321,8 +453,8 @@ class SalesDataAnalyzer:
         }).reset_index()
         
         weekly_trend.columns = ['Week', 'Weekly_Revenue', 'Weekly_Qty', 'Weekly_Margin']
-        
-        return weekly_trend.sort_values('Week')
+
+        return _m4(weekly_trend.sort_values('Week'), 'Week', 'Weekly_Revenue')
     
     def get_sales_heatmap_data(self, data):
         """
@@ -334,14 +466,25 @@ class SalesDataAnalyzer:
         Returns:
             pd.DataFrame: Heatmap data
         """
-        heatmap_data = data.groupby(['Hour', 'Day_of_Week'])['Total'].sum().reset_index()
-        heatmap_pivot = heatmap_data.pivot(index='Hour', columns='Day_of_Week', values='Total').fillna(0)
-        
-        # Reorder columns by day of week
         day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        available_days = [day for day in day_order if day in heatmap_pivot.columns]
-        heatmap_pivot = heatmap_pivot[available_days]
-        
+
+        hours = data['Hour'].to_numpy()
+        days = data['Day_Index'].to_numpy()
+
+        # Satu pass scatter-add ke matriks 24x7, menggantikan
+        # groupby + pivot dua tahap
+        matrix = np.zeros((24, 7))
+        np.add.at(matrix, (hours, days), data['Total'].to_numpy(dtype='float64'))
+
+        # Hanya jam dan hari yang muncul di data, urut Senin-Minggu
+        observed_hours = np.unique(hours)
+        observed_days = np.unique(days)
+
+        heatmap_pivot = pd.DataFrame(
+            matrix[np.ix_(observed_hours, observed_days)],
+            index=pd.Index(observed_hours, name='Hour'),
+            columns=pd.Index([day_order[d] for d in observed_days], name='Day_of_Week')
+        )
         return heatmap_pivot
     
     def get_menu_profitability_analysis(self, data):
@@ -354,7 +497,7 @@ class SalesDataAnalyzer:
         Returns:
             pd.DataFrame: Menu profitability analysis
         """
-        menu_profit = data.groupby(['Menu', 'Menu Category']).agg({
+        menu_profit = data.groupby(['Menu', 'Menu Category'], observed=True).agg({
             'Total': 'sum',
             'Margin': 'sum',
             'COGS Total': 'sum',
@@ -402,14 +545,12 @@ class SalesDataAnalyzer:
         Returns:
             pd.DataFrame: High COGS menus
         """
-        high_cogs = data.groupby('Menu').agg({
-            'COGS Total (%)': 'mean',
-            'Total': 'sum',
-            'Qty': 'sum'
-        }).reset_index()
-        
-        high_cogs.columns = ['Menu', 'Avg_COGS_Pct', 'Total_Revenue', 'Total_Qty']
-        
+        high_cogs = _menu_group_reduce(
+            data,
+            sum_cols={'Total_Revenue': 'Total', 'Total_Qty': 'Qty'},
+            mean_cols={'Avg_COGS_Pct': 'COGS Total (%)'}
+        )[['Menu', 'Avg_COGS_Pct', 'Total_Revenue', 'Total_Qty']]
+
         return high_cogs.nlargest(top_n, 'Avg_COGS_Pct')
     
     def get_low_cogs_menus(self, data, top_n=10):
@@ -423,14 +564,12 @@ class SalesDataAnalyzer:
         Returns:
             pd.DataFrame: Low COGS menus
         """
-        low_cogs = data.groupby('Menu').agg({
-            'COGS Total (%)': 'mean',
-            'Total': 'sum',
-            'Qty': 'sum'
-        }).reset_index()
-        
-        low_cogs.columns = ['Menu', 'Avg_COGS_Pct', 'Total_Revenue', 'Total_Qty']
-        
+        low_cogs = _menu_group_reduce(
+            data,
+            sum_cols={'Total_Revenue': 'Total', 'Total_Qty': 'Qty'},
+            mean_cols={'Avg_COGS_Pct': 'COGS Total (%)'}
+        )[['Menu', 'Avg_COGS_Pct', 'Total_Revenue', 'Total_Qty']]
+
         return low_cogs.nsmallest(top_n, 'Avg_COGS_Pct')
     
     def calculate_cogs_efficiency(self, data):
@@ -476,7 +615,7 @@ class SalesDataAnalyzer:
             })
         
         # Analisis kategori dengan COGS tinggi
-        category_cogs = data.groupby('Menu Category')['COGS Total (%)'].mean().sort_values(ascending=False)
+        category_cogs = data.groupby('Menu Category', observed=True)['COGS Total (%)'].mean().sort_values(ascending=False)
         if not category_cogs.empty:
             worst_category = category_cogs.index[0]
             worst_cogs_pct = category_cogs.iloc[0]
@@ -532,7 +671,7 @@ class SalesDataAnalyzer:
         top_profitable = self.get_most_profitable_menus(data, 5)
         
         # Category analysis
-        category_performance = data.groupby('Menu Category').agg({
+        category_performance = data.groupby('Menu Category', observed=True).agg({
             'Total': 'sum',
             'Margin': 'sum',
             'COGS Total (%)': 'mean'
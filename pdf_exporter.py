@@ -1,20 +1,96 @@
 import io
+from functools import cached_property
+import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # backend headless; hindari deteksi GUI toolkit saat import
 import matplotlib.pyplot as plt
-import seaborn as sns
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
+from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.barcharts import VerticalBarChart
-from reportlab.graphics.charts.piecharts import Pie
 from reportlab.lib.colors import HexColor
-import base64
 from datetime import datetime
-import warnings
-warnings.filterwarnings('ignore')
+
+# Palet warna laporan — objek HexColor dibuat sekali, bukan di-parse
+# ulang dari string di setiap TableStyle/ParagraphStyle
+COLOR_PRIMARY = HexColor('#2E86AB')
+COLOR_ACCENT = HexColor('#A23B72')
+COLOR_ORANGE = HexColor('#F18F01')
+COLOR_BG = HexColor('#F8F9FA')
+COLOR_BG_WARM = HexColor('#FFF3E0')
+
+# Template paragraf HTML dibangun sekali di level modul; section hanya
+# menyiapkan dict nilai yang sudah diformat lalu memanggil format_map
+_EXEC_SUMMARY_TMPL = """
+        <b>Performa Bisnis Periode {period}</b><br/><br/>
+
+        Analisis menunjukkan total revenue sebesar Rp {total_revenue} dengan gross margin {gross_margin_pct}%.
+        Rata-rata COGS sebesar {avg_cogs_pct}% menunjukkan {cogs_assessment}.<br/><br/>
+
+        <b>Highlight Utama:</b><br/>
+        • Menu terlaris: {top_menu} ({top_menu_qty} unit terjual)<br/>
+        • Menu paling menguntungkan: {profitable_menu} (margin {profitable_margin}%)<br/>
+        • Kategori terkuat: {top_category}<br/><br/>
+
+        <b>Area Fokus:</b><br/>
+        • {cogs_focus}<br/>
+        • Pengembangan menu dengan performa tinggi<br/>
+        • Analisis pricing strategy untuk menu underperform
+        """
+
+_COGS_OVERVIEW_TMPL = """
+        <b>Overview COGS:</b><br/>
+        • Total COGS: Rp {total_cogs}<br/>
+        • COGS Percentage: {cogs_pct}% dari total revenue<br/>
+        • Rata-rata COGS per transaksi: {avg_cogs_pct}%<br/>
+        • Efisiensi COGS: {cogs_efficiency}%<br/><br/>
+
+        <b>Interpretasi:</b><br/>
+        • COGS {avg_cogs_pct}% {cogs_assessment}<br/>
+        • {cogs_action}
+        """
+
+_RECOMMENDATION_TMPL = """
+            <b>{index}. {title}</b><br/>
+            {description}<br/>
+            <i>Potensi Impact: {potential_saving}</i><br/>
+            """
+
+# Perintah TableStyle yang identik di semua tabel laporan; tiap tabel
+# hanya menambahkan warna header, ukuran font, dan aksen barisnya
+_BASE_CMDS = [
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+]
+
+def _table_style(header_color, header_size, body_size, extra=()):
+    """Susun TableStyle dari template dasar + perintah khusus tabel."""
+    return TableStyle(_BASE_CMDS + [
+        ('BACKGROUND', (0, 0), (-1, 0), header_color),
+        ('FONTSIZE', (0, 0), (-1, 0), header_size),
+        ('FONTSIZE', (0, 1), (-1, -1), body_size),
+        *extra,
+    ])
+
+# Stylesheet dan style paragraf dibangun sekali di level modul;
+# ParagraphStyle bersifat immutable selama dipakai sehingga aman
+# dibagi antar instance exporter
+_STYLES = getSampleStyleSheet()
+
+def _truncate_names(series, limit):
+    """
+    Potong string yang melebihi limit karakter dan beri akhiran '...'.
+
+    Vectorized lewat str.slice + where, menggantikan pengecekan
+    len() per baris di loop penyusunan tabel.
+    """
+    names = series.astype(str)
+    return names.where(names.str.len() <= limit,
+                       names.str.slice(0, limit) + '...')
 
 class PDFExporter:
     """
@@ -27,74 +103,181 @@ class PDFExporter:
     - Summary executive dan detailed analysis
     """
     
+    # Custom styles — singleton di level kelas, tidak dibuat ulang
+    # setiap laporan
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=_STYLES['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=1,  # Center alignment
+        textColor=COLOR_PRIMARY
+    )
+
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=_STYLES['Heading2'],
+        fontSize=16,
+        spaceAfter=12,
+        textColor=COLOR_ACCENT,
+        borderWidth=1,
+        borderColor=COLOR_ACCENT,
+        borderPadding=5
+    )
+
+    subheading_style = ParagraphStyle(
+        'CustomSubHeading',
+        parent=_STYLES['Heading3'],
+        fontSize=14,
+        spaceAfter=8,
+        textColor=COLOR_ORANGE
+    )
+
+    body_style = ParagraphStyle(
+        'CustomBody',
+        parent=_STYLES['Normal'],
+        fontSize=10,
+        spaceAfter=6
+    )
+
+    metric_style = ParagraphStyle(
+        'MetricStyle',
+        parent=_STYLES['Normal'],
+        fontSize=12,
+        textColor=COLOR_PRIMARY,
+        alignment=1,
+        spaceAfter=10
+    )
+
     def __init__(self, analyzer, data):
         """
         Inisialisasi PDF exporter.
-        
+
         Args:
             analyzer: Instance SalesDataAnalyzer
             data: DataFrame yang sudah difilter
         """
         self.analyzer = analyzer
-        self.data = data
+        # Pastikan kolom kunci groupby ber-dtype category. Frame dari
+        # SalesDataAnalyzer sudah demikian; guard ini melindungi pemakaian
+        # langsung dengan frame mentah tanpa memutasi frame milik caller.
+        string_keys = {
+            col: data[col].astype('category')
+            for col in ('Menu Category', 'Menu')
+            if col in data.columns
+            and not isinstance(data[col].dtype, pd.CategoricalDtype)
+        }
+        self.data = data.assign(**string_keys) if string_keys else data
         self.doc_buffer = io.BytesIO()
-        self.styles = getSampleStyleSheet()
-        
-        # Custom styles
-        self.title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1,  # Center alignment
-            textColor=HexColor('#2E86AB')
-        )
-        
-        self.heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            textColor=HexColor('#A23B72'),
-            borderWidth=1,
-            borderColor=HexColor('#A23B72'),
-            borderPadding=5
-        )
-        
-        self.subheading_style = ParagraphStyle(
-            'CustomSubHeading',
-            parent=self.styles['Heading3'],
-            fontSize=14,
-            spaceAfter=8,
-            textColor=HexColor('#F18F01')
-        )
-        
-        self.body_style = ParagraphStyle(
-            'CustomBody',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=6
+        self._fig = None  # Figure matplotlib dialokasikan saat chart pertama
+        self.styles = _STYLES
+
+        # Agregat global dihitung sekali untuk semua section
+        self._precompute_aggregates()
+
+    def _precompute_aggregates(self):
+        """
+        Hitung agregat kolom yang dipakai berulang di hampir semua section.
+
+        Sebelumnya tiap _create_* memanggil self.data['Total'].sum() dkk.
+        sendiri-sendiri sehingga kolom yang sama discan berkali-kali;
+        sekarang satu pass .agg() dan hasilnya disimpan di self._agg.
+        """
+        self._agg = self.data.agg({
+            'Total': 'sum',
+            'Margin': 'sum',
+            'COGS Total': 'sum',
+            'COGS Total (%)': 'mean',
+            'Qty': 'sum'
+        }).to_dict()
+
+        # Rasio dihitung dengan guard skalar eksplisit agar data kosong
+        # menghasilkan 0.0, bukan warning pembagian nol + NaN di tabel
+        total_revenue = self._agg['Total']
+        self._agg['gross_margin_pct'] = (
+            (self._agg['Margin'] / total_revenue) * 100 if total_revenue else 0.0)
+        self._agg['cogs_pct'] = (
+            (self._agg['COGS Total'] / total_revenue) * 100 if total_revenue else 0.0)
+        self._agg['total_transactions'] = len(self.data)
+
+        # Agregat per kategori dipakai bersama oleh analisis finansial
+        # dan _get_top_category (dulu masing-masing groupby sendiri).
+        # Index kategori dipertahankan (tanpa reset_index) dan kolom
+        # turunan ditambahkan lewat satu assign, bukan append per kolom.
+        category_agg = self.data.groupby('Menu Category', observed=True).agg(
+            Total=('Total', 'sum'),
+            Margin=('Margin', 'sum'),
+            COGS=('COGS Total', 'sum'),
+            Qty=('Qty', 'sum')
         )
-        
-        self.metric_style = ParagraphStyle(
-            'MetricStyle',
-            parent=self.styles['Normal'],
-            fontSize=12,
-            textColor=HexColor('#2E86AB'),
-            alignment=1,
-            spaceAfter=10
+        category_total = category_agg['Total'].where(category_agg['Total'] != 0)
+        self._category_agg = category_agg.assign(
+            Margin_Pct=(category_agg['Margin'] / category_total * 100).fillna(0.0),
+            COGS_Pct=(category_agg['COGS'] / category_total * 100).fillna(0.0)
         )
-    
-    def generate_report(self):
+
+    def _fig_to_image(self, render_fn, width=5.5 * inch):
+        """
+        Render chart matplotlib ke PNG in-memory sebagai flowable Image.
+
+        Satu Figure dipakai ulang antar panggilan (clf sebelum render)
+        sehingga alokasi canvas tidak berulang per chart.
+
+        Args:
+            render_fn: Callable yang menerima Figure dan menggambar di atasnya
+            width: Lebar Image di dokumen (tinggi mengikuti rasio 3:2)
+        """
+        if self._fig is None:
+            self._fig = plt.figure(figsize=(6, 4))
+        self._fig.clf()
+        render_fn(self._fig)
+
+        buf = io.BytesIO()
+        self._fig.savefig(buf, format='png', dpi=110, bbox_inches='tight')
+        buf.seek(0)
+        return Image(buf, width=width, height=width * 2 / 3)
+
+    # Slice terbesar yang ditampilkan laporan; section lain mengiris
+    # .head(n) dari hasil yang sama sehingga leaderboard cukup dihitung
+    # satu kali per laporan
+    _LEADERBOARD_N = 10
+
+    @cached_property
+    def _top_menus(self):
+        """Leaderboard menu terlaris, dihitung sekali per laporan."""
+        return self.analyzer.get_top_performing_menus(self.data, self._LEADERBOARD_N)
+
+    @cached_property
+    def _profitable_menus(self):
+        """Leaderboard menu paling menguntungkan, dihitung sekali per laporan."""
+        return self.analyzer.get_most_profitable_menus(self.data, self._LEADERBOARD_N)
+
+    @cached_property
+    def _high_cogs_menus(self):
+        """Leaderboard menu dengan COGS tertinggi, dihitung sekali per laporan."""
+        return self.analyzer.get_high_cogs_menus(self.data, self._LEADERBOARD_N)
+
+    @cached_property
+    def _menu_analysis(self):
+        """Analisis komprehensif semua menu, dihitung sekali per laporan."""
+        return self.analyzer.get_comprehensive_menu_analysis(self.data)
+
+    def generate_report(self, out=None):
         """
         Generate comprehensive PDF report.
-        
+
+        Args:
+            out: Stream tujuan opsional (file/socket). Bila diberikan,
+                reportlab menulis langsung ke sana tanpa menahan seluruh
+                dokumen di buffer internal.
+
         Returns:
-            io.BytesIO: Buffer containing PDF data
+            io.BytesIO: Buffer containing PDF data (bila out None),
+                selain itu objek out yang sama
         """
         # Create document
         doc = SimpleDocTemplate(
-            self.doc_buffer,
+            out if out is not None else self.doc_buffer,
             pagesize=A4,
             rightMargin=72,
             leftMargin=72,
@@ -130,8 +313,10 @@ class PDFExporter:
         
         # Build PDF
         doc.build(story)
-        
-        # Return buffer
+
+        # Return buffer (atau stream milik caller apa adanya)
+        if out is not None:
+            return out
         self.doc_buffer.seek(0)
         return self.doc_buffer
     
@@ -161,33 +346,21 @@ class PDFExporter:
         
         story.append(Spacer(1, 50))
         
-        # Key metrics overview
-        total_revenue = self.data['Total'].sum()
-        total_margin = self.data['Margin'].sum()
-        total_transactions = len(self.data)
-        avg_cogs_pct = self.data['COGS Total (%)'].mean()
-        
+        # Key metrics overview (agregat sudah dihitung di awal)
         metrics_data = [
             ['Metric', 'Nilai'],
-            ['Total Revenue', f'Rp {total_revenue:,.0f}'],
-            ['Total Margin', f'Rp {total_margin:,.0f}'],
-            ['Gross Margin %', f'{(total_margin/total_revenue*100):.1f}%'],
-            ['Total Transaksi', f'{total_transactions:,}'],
-            ['Rata-rata COGS %', f'{avg_cogs_pct:.1f}%']
+            ['Total Revenue', f"Rp {self._agg['Total']:,.0f}"],
+            ['Total Margin', f"Rp {self._agg['Margin']:,.0f}"],
+            ['Gross Margin %', f"{self._agg['gross_margin_pct']:.1f}%"],
+            ['Total Transaksi', f"{self._agg['total_transactions']:,}"],
+            ['Rata-rata COGS %', f"{self._agg['COGS Total (%)']:.1f}%"]
         ]
         
         metrics_table = Table(metrics_data, colWidths=[2*inch, 2*inch])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), HexColor('#2E86AB')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
+        metrics_table.setStyle(_table_style(COLOR_PRIMARY, 12, 10, extra=[
             ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), HexColor('#F8F9FA')),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ('BACKGROUND', (0, 1), (-1, -1), COLOR_BG),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica')
         ]))
         
         story.append(Paragraph("<b>Key Metrics Overview</b>", self.heading_style))
@@ -201,36 +374,33 @@ class PDFExporter:
         
         story.append(Paragraph("📋 RINGKASAN EKSEKUTIF", self.heading_style))
         
-        # Calculate key insights
-        total_revenue = self.data['Total'].sum()
-        total_margin = self.data['Margin'].sum()
-        gross_margin_pct = (total_margin / total_revenue) * 100
-        avg_cogs_pct = self.data['COGS Total (%)'].mean()
-        
-        # Top performing menu
-        top_menu = self.analyzer.get_top_performing_menus(self.data, 1)
-        most_profitable = self.analyzer.get_most_profitable_menus(self.data, 1)
-        
-        # Summary text
-        summary_text = f"""
-        <b>Performa Bisnis Periode {self.analyzer.get_date_range()}</b><br/><br/>
-        
-        Analisis menunjukkan total revenue sebesar Rp {total_revenue:,.0f} dengan gross margin {gross_margin_pct:.1f}%. 
-        Rata-rata COGS sebesar {avg_cogs_pct:.1f}% menunjukkan {'efisiensi yang baik' if avg_cogs_pct < 30 else 'area yang perlu optimasi'}.<br/><br/>
-        
-        <b>Highlight Utama:</b><br/>
-        • Menu terlaris: {top_menu.iloc[0]['Menu'] if not top_menu.empty else 'N/A'} 
-        ({top_menu.iloc[0]['Total_Qty'] if not top_menu.empty else 0} unit terjual)<br/>
-        • Menu paling menguntungkan: {most_profitable.iloc[0]['Menu'] if not most_profitable.empty else 'N/A'} 
-        (margin {most_profitable.iloc[0]['Margin_Percentage'] if not most_profitable.empty else 0:.1f}%)<br/>
-        • Kategori terkuat: {self._get_top_category()}<br/><br/>
-        
-        <b>Area Fokus:</b><br/>
-        • {'Optimasi COGS untuk meningkatkan margin' if avg_cogs_pct > 25 else 'Mempertahankan efisiensi COGS'}<br/>
-        • Pengembangan menu dengan performa tinggi<br/>
-        • Analisis pricing strategy untuk menu underperform
-        """
-        
+        # Key insights dari agregat global
+        total_revenue = self._agg['Total']
+        gross_margin_pct = self._agg['gross_margin_pct']
+        avg_cogs_pct = self._agg['COGS Total (%)']
+        
+        # Top performing menu (iris dari leaderboard yang di-cache)
+        top_menu = self._top_menus.head(1)
+        most_profitable = self._profitable_menus.head(1)
+        
+        # Summary text dari template modul + dict nilai terformat
+        summary_text = _EXEC_SUMMARY_TMPL.format_map({
+            'period': self.analyzer.get_date_range(),
+            'total_revenue': f"{total_revenue:,.0f}",
+            'gross_margin_pct': f"{gross_margin_pct:.1f}",
+            'avg_cogs_pct': f"{avg_cogs_pct:.1f}",
+            'cogs_assessment': ('efisiensi yang baik' if avg_cogs_pct < 30
+                                else 'area yang perlu optimasi'),
+            'top_menu': top_menu.iloc[0]['Menu'] if not top_menu.empty else 'N/A',
+            'top_menu_qty': top_menu.iloc[0]['Total_Qty'] if not top_menu.empty else 0,
+            'profitable_menu': (most_profitable.iloc[0]['Menu']
+                                if not most_profitable.empty else 'N/A'),
+            'profitable_margin': f"{most_profitable.iloc[0]['Margin_Percentage'] if not most_profitable.empty else 0:.1f}",
+            'top_category': self._get_top_category(),
+            'cogs_focus': ('Optimasi COGS untuk meningkatkan margin' if avg_cogs_pct > 25
+                           else 'Mempertahankan efisiensi COGS'),
+        })
+
         story.append(Paragraph(summary_text, self.body_style))
         story.append(Spacer(1, 20))
         
@@ -242,55 +412,36 @@ class PDFExporter:
         
         story.append(Paragraph("💰 ANALISIS FINANSIAL", self.heading_style))
         
-        # Revenue breakdown by category
-        category_revenue = self.data.groupby('Menu Category').agg({
-            'Total': 'sum',
-            'Margin': 'sum',
-            'COGS Total': 'sum',
-            'Qty': 'sum'
-        }).reset_index()
-        
-        category_revenue['Margin_Pct'] = (category_revenue['Margin'] / category_revenue['Total']) * 100
-        category_revenue['COGS_Pct'] = (category_revenue['COGS Total'] / category_revenue['Total']) * 100
-        
+        # Revenue breakdown by category (groupby dihitung sekali di awal)
+        category_revenue = self._category_agg
+
         # Create table
         table_data = [['Kategori', 'Revenue (Rp)', 'Margin (%)', 'COGS (%)', 'Qty Terjual']]
+
+        # Format per kolom di atas ndarray lalu zip jadi baris — menghindari
+        # akses baris-demi-baris pandas saat menyusun tabel
+        categories = category_revenue.index.astype(str)
+        revenue_s = [f"{v:,.0f}" for v in category_revenue['Total'].to_numpy()]
+        margin_s = [f"{v:.1f}%" for v in category_revenue['Margin_Pct'].to_numpy()]
+        cogs_s = [f"{v:.1f}%" for v in category_revenue['COGS_Pct'].to_numpy()]
+        qty_s = [f"{v:,.0f}" for v in category_revenue['Qty'].to_numpy()]
+
+        table_data.extend(map(list, zip(categories, revenue_s, margin_s, cogs_s, qty_s)))
         
-        for _, row in category_revenue.iterrows():
-            table_data.append([
-                row['Menu Category'],
-                f"{row['Total']:,.0f}",
-                f"{row['Margin_Pct']:.1f}%",
-                f"{row['COGS_Pct']:.1f}%",
-                f"{row['Qty']:,.0f}"
-            ])
-        
-        # Add total row
-        total_revenue = self.data['Total'].sum()
-        total_margin = self.data['Margin'].sum()
-        total_cogs = self.data['COGS Total'].sum()
-        total_qty = self.data['Qty'].sum()
-        
+        # Add total row (dari agregat global)
         table_data.append([
             'TOTAL',
-            f"{total_revenue:,.0f}",
-            f"{(total_margin/total_revenue*100):.1f}%",
-            f"{(total_cogs/total_revenue*100):.1f}%",
-            f"{total_qty:,.0f}"
+            f"{self._agg['Total']:,.0f}",
+            f"{self._agg['gross_margin_pct']:.1f}%",
+            f"{self._agg['cogs_pct']:.1f}%",
+            f"{self._agg['Qty']:,.0f}"
         ])
         
         revenue_table = Table(table_data, colWidths=[1.5*inch, 1.2*inch, 0.8*inch, 0.8*inch, 1*inch])
-        revenue_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), HexColor('#2E86AB')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, -1), (-1, -1), HexColor('#A23B72')),
+        revenue_table.setStyle(_table_style(COLOR_PRIMARY, 10, 9, extra=[
+            ('BACKGROUND', (0, -1), (-1, -1), COLOR_ACCENT),
             ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold')
         ]))
         
         story.append(Paragraph("Revenue dan Margin per Kategori", self.subheading_style))
@@ -302,17 +453,19 @@ class PDFExporter:
         
         story.append(Paragraph("Tren Performa Harian", self.subheading_style))
         
-        # Performance insights
-        avg_daily_revenue = daily_trend['Daily_Revenue'].mean()
-        best_day_revenue = daily_trend['Daily_Revenue'].max()
-        worst_day_revenue = daily_trend['Daily_Revenue'].min()
-        
+        # Performance insights (tiga statistik dalam satu pass kolom)
+        avg_daily_revenue, worst_day_revenue, best_day_revenue = (
+            daily_trend['Daily_Revenue'].agg(['mean', 'min', 'max']))
+        volatility_pct = (
+            (best_day_revenue - worst_day_revenue) / avg_daily_revenue * 100
+            if avg_daily_revenue else 0.0)
+
         performance_text = f"""
         <b>Analisis Performa Harian:</b><br/>
         • Rata-rata revenue harian: Rp {avg_daily_revenue:,.0f}<br/>
         • Revenue tertinggi: Rp {best_day_revenue:,.0f}<br/>
         • Revenue terendah: Rp {worst_day_revenue:,.0f}<br/>
-        • Volatilitas: {((best_day_revenue - worst_day_revenue) / avg_daily_revenue * 100):.1f}%<br/>
+        • Volatilitas: {volatility_pct:.1f}%<br/>
         """
         
         story.append(Paragraph(performance_text, self.body_style))
@@ -328,29 +481,21 @@ class PDFExporter:
         # Top performing menus
         story.append(Paragraph("Top 10 Menu Terlaris", self.subheading_style))
         
-        top_menus = self.analyzer.get_top_performing_menus(self.data, 10)
-        
+        top_menus = self._top_menus
+
         menu_table_data = [['Rank', 'Menu', 'Qty Terjual', 'Revenue (Rp)', 'Margin (%)']]
         
-        for i, (_, row) in enumerate(top_menus.iterrows(), 1):
-            menu_table_data.append([
-                str(i),
-                row['Menu'][:30] + '...' if len(row['Menu']) > 30 else row['Menu'],
-                f"{row['Total_Qty']:,.0f}",
-                f"{row['Total_Revenue']:,.0f}",
-                f"{row['Margin_Percentage']:.1f}%"
-            ])
+        ranks = [str(i) for i in range(1, len(top_menus) + 1)]
+        menus = _truncate_names(top_menus['Menu'], 30).to_numpy()
+        qty_s = [f"{v:,.0f}" for v in top_menus['Total_Qty'].to_numpy()]
+        revenue_s = [f"{v:,.0f}" for v in top_menus['Total_Revenue'].to_numpy()]
+        margin_s = [f"{v:.1f}%" for v in top_menus['Margin_Percentage'].to_numpy()]
+
+        menu_table_data.extend(map(list, zip(ranks, menus, qty_s, revenue_s, margin_s)))
         
         menu_table = Table(menu_table_data, colWidths=[0.5*inch, 2.5*inch, 0.8*inch, 1.2*inch, 0.8*inch])
-        menu_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), HexColor('#2E86AB')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, HexColor('#F8F9FA')])
+        menu_table.setStyle(_table_style(COLOR_PRIMARY, 9, 8, extra=[
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, COLOR_BG])
         ]))
         
         story.append(menu_table)
@@ -359,29 +504,21 @@ class PDFExporter:
         # Most profitable menus
         story.append(Paragraph("Top 10 Menu Paling Menguntungkan", self.subheading_style))
         
-        profitable_menus = self.analyzer.get_most_profitable_menus(self.data, 10)
-        
+        profitable_menus = self._profitable_menus
+
         profit_table_data = [['Rank', 'Menu', 'Margin/Unit (Rp)', 'Margin (%)', 'Total Qty']]
         
-        for i, (_, row) in enumerate(profitable_menus.iterrows(), 1):
-            profit_table_data.append([
-                str(i),
-                row['Menu'][:30] + '...' if len(row['Menu']) > 30 else row['Menu'],
-                f"{row['Avg_Margin']:,.0f}",
-                f"{row['Margin_Percentage']:.1f}%",
-                f"{row['Total_Qty']:,.0f}"
-            ])
+        ranks = [str(i) for i in range(1, len(profitable_menus) + 1)]
+        menus = _truncate_names(profitable_menus['Menu'], 30).to_numpy()
+        avg_margin_s = [f"{v:,.0f}" for v in profitable_menus['Avg_Margin'].to_numpy()]
+        margin_s = [f"{v:.1f}%" for v in profitable_menus['Margin_Percentage'].to_numpy()]
+        qty_s = [f"{v:,.0f}" for v in profitable_menus['Total_Qty'].to_numpy()]
+
+        profit_table_data.extend(map(list, zip(ranks, menus, avg_margin_s, margin_s, qty_s)))
         
         profit_table = Table(profit_table_data, colWidths=[0.5*inch, 2.5*inch, 1*inch, 0.8*inch, 0.8*inch])
-        profit_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), HexColor('#A23B72')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, HexColor('#F8F9FA')])
+        profit_table.setStyle(_table_style(COLOR_ACCENT, 9, 8, extra=[
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, COLOR_BG])
         ]))
         
         story.append(profit_table)
@@ -394,23 +531,22 @@ class PDFExporter:
         
         story.append(Paragraph("📦 ANALISIS COGS (COST OF GOODS SOLD)", self.heading_style))
         
-        # COGS overview
-        total_cogs = self.data['COGS Total'].sum()
-        total_revenue = self.data['Total'].sum()
-        avg_cogs_pct = self.data['COGS Total (%)'].mean()
+        # COGS overview (agregat global + efisiensi dari analyzer)
+        total_cogs = self._agg['COGS Total']
+        avg_cogs_pct = self._agg['COGS Total (%)']
         cogs_efficiency = self.analyzer.calculate_cogs_efficiency(self.data)
-        
-        cogs_text = f"""
-        <b>Overview COGS:</b><br/>
-        • Total COGS: Rp {total_cogs:,.0f}<br/>
-        • COGS Percentage: {(total_cogs/total_revenue*100):.1f}% dari total revenue<br/>
-        • Rata-rata COGS per transaksi: {avg_cogs_pct:.1f}%<br/>
-        • Efisiensi COGS: {cogs_efficiency:.1f}%<br/><br/>
-        
-        <b>Interpretasi:</b><br/>
-        • COGS {avg_cogs_pct:.1f}% {'berada dalam range ideal (20-30%)' if 20 <= avg_cogs_pct <= 30 else 'perlu optimasi' if avg_cogs_pct > 30 else 'sangat efisien'}<br/>
-        • {'Fokus pada optimasi supplier dan porsi' if avg_cogs_pct > 25 else 'Pertahankan efisiensi saat ini'}
-        """
+
+        cogs_text = _COGS_OVERVIEW_TMPL.format_map({
+            'total_cogs': f"{total_cogs:,.0f}",
+            'cogs_pct': f"{self._agg['cogs_pct']:.1f}",
+            'avg_cogs_pct': f"{avg_cogs_pct:.1f}",
+            'cogs_efficiency': f"{cogs_efficiency:.1f}",
+            'cogs_assessment': ('berada dalam range ideal (20-30%)' if 20 <= avg_cogs_pct <= 30
+                                else 'perlu optimasi' if avg_cogs_pct > 30
+                                else 'sangat efisien'),
+            'cogs_action': ('Fokus pada optimasi supplier dan porsi' if avg_cogs_pct > 25
+                            else 'Pertahankan efisiensi saat ini'),
+        })
         
         story.append(Paragraph(cogs_text, self.body_style))
         story.append(Spacer(1, 15))
@@ -418,29 +554,22 @@ class PDFExporter:
         # High COGS menus
         story.append(Paragraph("Menu dengan COGS Tertinggi", self.subheading_style))
         
-        high_cogs = self.analyzer.get_high_cogs_menus(self.data, 10)
-        
+        high_cogs = self._high_cogs_menus
+
         cogs_table_data = [['Menu', 'COGS (%)', 'Total Revenue (Rp)', 'Potensi Optimasi']]
         
-        for _, row in high_cogs.iterrows():
-            potential_saving = row['Total_Revenue'] * 0.05  # Estimasi 5% saving
-            cogs_table_data.append([
-                row['Menu'][:35] + '...' if len(row['Menu']) > 35 else row['Menu'],
-                f"{row['Avg_COGS_Pct']:.1f}%",
-                f"{row['Total_Revenue']:,.0f}",
-                f"Rp {potential_saving:,.0f}"
-            ])
+        # Potensi optimasi = estimasi 5% saving dari revenue menu
+        menus = _truncate_names(high_cogs['Menu'], 35).to_numpy()
+        revenue_arr = high_cogs['Total_Revenue'].to_numpy()
+        cogs_s = [f"{v:.1f}%" for v in high_cogs['Avg_COGS_Pct'].to_numpy()]
+        revenue_s = [f"{v:,.0f}" for v in revenue_arr]
+        saving_s = [f"Rp {v * 0.05:,.0f}" for v in revenue_arr]
+
+        cogs_table_data.extend(map(list, zip(menus, cogs_s, revenue_s, saving_s)))
         
         cogs_table = Table(cogs_table_data, colWidths=[2.2*inch, 0.8*inch, 1.2*inch, 1.2*inch])
-        cogs_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), HexColor('#F18F01')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, HexColor('#FFF3E0')])
+        cogs_table.setStyle(_table_style(COLOR_ORANGE, 9, 8, extra=[
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, COLOR_BG_WARM])
         ]))
         
         story.append(cogs_table)
@@ -462,12 +591,8 @@ class PDFExporter:
         all_recommendations = recommendations + general_recommendations
         
         for i, rec in enumerate(all_recommendations, 1):
-            rec_text = f"""
-            <b>{i}. {rec['title']}</b><br/>
-            {rec['description']}<br/>
-            <i>Potensi Impact: {rec['potential_saving']}</i><br/>
-            """
-            
+            rec_text = _RECOMMENDATION_TMPL.format_map({'index': i, **rec})
+
             story.append(Paragraph(rec_text, self.body_style))
             story.append(Spacer(1, 10))
         
@@ -498,22 +623,35 @@ class PDFExporter:
     
     def _get_top_category(self):
         """Get top performing category."""
-        category_revenue = self.data.groupby('Menu Category')['Total'].sum()
-        if not category_revenue.empty:
-            return category_revenue.idxmax()
-        return "N/A"
+        category_agg = getattr(self, '_category_agg', None)
+        if category_agg is not None:
+            if category_agg.empty:
+                return "N/A"
+            return category_agg['Total'].idxmax()
+
+        # Fallback tanpa cache agregat: satu pass bincount di atas kode
+        # categorical, tanpa mesin groupby pandas
+        if self.data.empty:
+            return "N/A"
+        cat = self.data['Menu Category'].cat
+        sums = np.bincount(cat.codes.to_numpy(),
+                           weights=self.data['Total'].to_numpy(dtype='float64'),
+                           minlength=len(cat.categories))
+        return cat.categories[sums.argmax()]
     
     def _generate_business_recommendations(self):
         """Generate general business recommendations."""
         recommendations = []
         
-        # Analyze menu performance
-        menu_analysis = self.analyzer.get_comprehensive_menu_analysis(self.data)
+        # Analyze menu performance (hasil analisis menyeluruh di-cache)
+        menu_analysis = self._menu_analysis
         
-        # Revenue concentration
-        total_revenue = self.data['Total'].sum()
-        top_5_revenue = menu_analysis.head(5)['Total_Revenue'].sum()
-        concentration = (top_5_revenue / total_revenue) * 100
+        # Revenue concentration — nlargest (partial sort) memastikan benar-benar
+        # 5 revenue terbesar; head(5) lama bergantung pada urutan frame yang
+        # tidak dijamin terurut berdasarkan revenue
+        total_revenue = self._agg['Total']
+        top_5_revenue = menu_analysis['Total_Revenue'].nlargest(5).sum()
+        concentration = (top_5_revenue / total_revenue) * 100 if total_revenue else 0.0
         
         if concentration > 60:
             recommendations.append({
@@ -522,27 +660,35 @@ class PDFExporter:
                 'potential_saving': 'Stabilitas revenue jangka panjang'
             })
         
-        # Low performers
-        low_performers = menu_analysis[menu_analysis['Total_Qty'] < menu_analysis['Total_Qty'].quantile(0.2)]
-        
-        if len(low_performers) > 0:
+        # Ambang kuantil dihitung sekali dalam satu pass per kolom;
+        # mask dibangun di atas ndarray agar filter tetap di jalur NumPy
+        qty_quantiles = menu_analysis['Total_Qty'].quantile([0.2, 0.5])
+        margin_q80 = menu_analysis['Margin_Percentage'].quantile(0.8)
+        qty_arr = menu_analysis['Total_Qty'].to_numpy()
+        margin_arr = menu_analysis['Margin_Percentage'].to_numpy()
+
+        # Low performers — cukup hitung jumlahnya dari mask, tanpa
+        # mematerialisasi frame hasil filter
+        low_count = int(np.count_nonzero(qty_arr < qty_quantiles.loc[0.2]))
+
+        if low_count > 0:
             recommendations.append({
                 'title': 'Optimasi Menu Underperform',
-                'description': f'{len(low_performers)} menu memiliki penjualan rendah. Pertimbangkan redesign, repricing, atau discontinue.',
+                'description': f'{low_count} menu memiliki penjualan rendah. Pertimbangkan redesign, repricing, atau discontinue.',
                 'potential_saving': 'Efisiensi operasional dan inventory'
             })
-        
+
         # Pricing opportunities
-        high_margin_low_volume = menu_analysis[
-            (menu_analysis['Margin_Percentage'] > menu_analysis['Margin_Percentage'].quantile(0.8)) &
-            (menu_analysis['Total_Qty'] < menu_analysis['Total_Qty'].median())
-        ]
-        
-        if len(high_margin_low_volume) > 0:
+        hml_mask = np.logical_and(
+            margin_arr > margin_q80, qty_arr < qty_quantiles.loc[0.5])
+        hml_count = int(np.count_nonzero(hml_mask))
+
+        if hml_count > 0:
+            hml_margin_sum = menu_analysis['Total_Margin'].to_numpy()[hml_mask].sum()
             recommendations.append({
                 'title': 'Marketing Focus Menu High-Margin',
-                'description': f'{len(high_margin_low_volume)} menu memiliki margin tinggi tapi volume rendah. Tingkatkan visibility dan promosi.',
-                'potential_saving': f'Potensi peningkatan margin Rp {high_margin_low_volume["Total_Margin"].sum() * 2:,.0f}'
+                'description': f'{hml_count} menu memiliki margin tinggi tapi volume rendah. Tingkatkan visibility dan promosi.',
+                'potential_saving': f'Potensi peningkatan margin Rp {hml_margin_sum * 2:,.0f}'
             })
         
         return recommendations
\ No newline at end of file